@@ -1,2 +1,3 @@
 #!/usr/bin/env bash
-kopf run ./handlers.py --verbose --standalone --all-namespaces --log-format full
+kopf run ./handlers.py --verbose --standalone --all-namespaces --log-format full \
+  --liveness=http://0.0.0.0:8080/healthz
@@ -1,9 +1,12 @@
 """A kopf handler for the DataManagerJob CRD."""
 
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 import os
 import shlex
+import threading
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import logging
 import kopf
@@ -17,6 +20,30 @@ import kubernetes
 #   (connection, read) timeouts.
 _REQUEST_TIMEOUT = (30, 20)
 
+
+def _process_start_time() -> float:
+    """Returns the time the operator process started (on the monotonic clock).
+    It's calculated from the process start time (relative to boot) in /proc,
+    falling back to 'now' (i.e. when this module is loaded) if that's unavailable.
+    """
+    now: float = time.monotonic()
+    try:
+        with open("/proc/self/stat", encoding="utf8") as stat_file:
+            # The process start time (in clock ticks since boot) is field 22.
+            # Fields are counted after the command, which may contain spaces.
+            start_ticks: int = int(stat_file.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", encoding="utf8") as uptime_file:
+            uptime_s: float = float(uptime_file.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return now
+    process_age_s: float = uptime_s - start_ticks / os.sysconf("SC_CLK_TCK")
+    return now - max(0.0, process_age_s)
+
+
+# The time the operator process started (monotonic).
+# Used to report the operator's time-to-ready.
+_PROCESS_START_TIME: float = _process_start_time()
+
 # Pod pre-delete delay (seconds).
 # A fixed period of time the 'job_event' method waits
 # after deciding to delete the Pod before actually deleting it.
@@ -65,6 +92,36 @@ _POD_DEFAULT_MEMORY: str = os.environ.get("JO_POD_DEFAULT_MEMORY", "1Gi")
 # By default it's the DM's built-in app-based service account
 _POD_SA: str = os.environ.get("JO_POD_SA", "data-manager-app")
 
+# Startup resync?
+# Unless 'true' it's 'false'.
+# If 'true' the operator scans all existing Job Pods in a background thread
+# when it starts, deleting those that reached a terminal phase while the operator
+# was not running (and were therefore never seen by 'job_event').
+# The scan does not block the operator, new creates are handled while it runs.
+_STARTUP_RESYNC: str = os.environ.get("JO_STARTUP_RESYNC", "false")
+# The number of Pods fetched in each page of the startup resync
+# (at least 1, a 'limit' of 0 would turn pagination off)
+_STARTUP_RESYNC_PAGE_SIZE: int = max(
+    1, int(os.environ.get("JO_STARTUP_RESYNC_PAGE_SIZE", "100"))
+)
+# The number of concurrent deletions during the startup resync (at least 1)
+_STARTUP_RESYNC_WORKERS: int = max(
+    1, int(os.environ.get("JO_STARTUP_RESYNC_WORKERS", "8"))
+)
+
+# The label selector identifying Job Pods (those we're expected to clean up)
+# and the Pod phases that indicate the Job has finished.
+_JOB_POD_LABEL_SELECTOR: str = "data-manager.informaticsmatters.com/instance-is-job=yes"
+_POD_TERMINAL_PHASES: List[str] = ["Succeeded", "Failed", "Completed"]
+
+# Set once kopf has logged in (see 'login').
+# The resync waits for this before using the Kubernetes client.
+_logged_in: threading.Event = threading.Event()
+
+# Startup metrics (time-to-ready and resync progress).
+# Written to the log and reported by the 'startup_probe' handler.
+_startup_metrics: Dict[str, Any] = {}
+
 # Some (key) default variables...
 default_cpu: str = _POD_DEFAULT_CPU
 default_memory: str = _POD_DEFAULT_MEMORY
@@ -123,6 +180,229 @@ def configure(settings: kopf.OperatorSettings, **_):
         logging.info(
             "Startup _DEFAULT_POD_PRIORITY_CLASS=%s", _DEFAULT_POD_PRIORITY_CLASS
         )
+    logging.info("Startup _STARTUP_RESYNC=%s", _STARTUP_RESYNC)
+
+    # Start the resync (if enabled).
+    # It runs in a daemon thread so that it does not delay
+    # the operator's watch-streams (and the handling of new creates).
+    if _STARTUP_RESYNC.lower() == "true":
+        logging.info("Startup _STARTUP_RESYNC_PAGE_SIZE=%s", _STARTUP_RESYNC_PAGE_SIZE)
+        logging.info("Startup _STARTUP_RESYNC_WORKERS=%s", _STARTUP_RESYNC_WORKERS)
+        _startup_metrics["resync"] = "running"
+        threading.Thread(
+            target=_resync_job_pods, name="startup-resync", daemon=True
+        ).start()
+
+
+@kopf.on.login()
+def login(**kwargs):
+    """The operator login handler.
+    We use kopf's own client-based login but record the first login,
+    which is when the operator is ready - kopf starts its watch-streams
+    once it has credentials (and after all the startup handlers have run).
+    """
+    connection_info = kopf.login_via_client(**kwargs)
+
+    # kopf may log in again (if credentials expire),
+    # we're only interested in the first.
+    if not _logged_in.is_set():
+        time_to_ready_s: float = time.monotonic() - _PROCESS_START_TIME
+        _startup_metrics["time_to_ready_s"] = round(time_to_ready_s, 3)
+        logging.info("Startup time_to_ready_s=%.3f", time_to_ready_s)
+        _logged_in.set()
+
+    return connection_info
+
+
+@kopf.on.probe(id="startup")
+def startup_probe(**_):
+    """Reports the startup metrics (via the operator's liveness endpoint)."""
+    return dict(_startup_metrics)
+
+
+def _job_pod_can_be_deleted(
+    pod_name: str, pod_phase: str, pod_labels: Optional[Dict[str, str]]
+) -> bool:
+    """Returns True if the Job Pod has finished
+    and is not protected from deletion by a debug label.
+    """
+    if pod_phase not in _POD_TERMINAL_PHASES:
+        return False
+
+    # Ignore Pods that are explicitly marked for debug.
+    if pod_labels and "debug" in pod_labels:
+        logging.warning(
+            'Not deleting Job "%s".'
+            " It is protected from deletion"
+            " as it has a debug label.",
+            pod_name,
+        )
+        return False
+
+    return True
+
+
+def _pod_finished_at(pod: kubernetes.client.V1Pod) -> Optional[datetime]:
+    """Returns the time the last of the Pod's containers terminated,
+    or None if it cannot be found.
+    """
+    finished_at: Optional[datetime] = None
+    for container_status in pod.status.container_statuses or []:
+        terminated = container_status.state and container_status.state.terminated
+        if terminated and terminated.finished_at:
+            if not finished_at or terminated.finished_at > finished_at:
+                finished_at = terminated.finished_at
+    return finished_at
+
+
+def _resync_delete_job_objects(
+    pod_name: str, pod_namespace: str, finished_at: Optional[datetime]
+) -> bool:
+    """Deletes a finished Job Pod (and its ConfigMap) found by the resync.
+    The resync runs alongside the watch-streams, so it can find Pods that
+    have only just finished. These are given what remains of the
+    pre-delete delay (the full delay if we can't tell when the Pod finished).
+    Returns True if the Pod was deleted. Any failure is logged
+    (and results in False) so that it cannot stop the rest of the resync.
+    """
+    delay_s: float = _POD_PRE_DELETE_DELAY_S
+    if finished_at:
+        age_s: float = (datetime.now(timezone.utc) - finished_at).total_seconds()
+        delay_s = max(0.0, _POD_PRE_DELETE_DELAY_S - age_s)
+    if delay_s > 0:
+        logging.info(
+            'Deleting "%s" after a delay of %.1f seconds...', pod_name, delay_s
+        )
+        time.sleep(delay_s)
+
+    try:
+        return _delete_job_objects(pod_name, pod_namespace)
+    except Exception:  # pylint: disable=broad-except
+        logging.exception('Failed deleting "%s" during resync', pod_name)
+        return False
+
+
+def _resync_job_pods() -> None:
+    """Runs the startup resync. Job Pods are listed (across all namespaces)
+    a page at a time and any that have finished are deleted (in parallel).
+    Pods that are still running are left alone - 'job_event' will
+    see them when they finish.
+    """
+    # This thread starts before kopf has logged in
+    # (kopf only does that once all the startup handlers have returned)
+    # so wait until the Kubernetes client has been configured.
+    _logged_in.wait()
+
+    started: float = time.monotonic()
+    num_listed: int = 0
+    num_deleted: int = 0
+    continue_token: Optional[str] = None
+    resync_status: str = "failed"
+
+    try:
+        core_api: kubernetes.client.CoreV1Api = kubernetes.client.CoreV1Api()
+        with ThreadPoolExecutor(max_workers=_STARTUP_RESYNC_WORKERS) as executor:
+            while True:
+                # An ApiException here includes an expired continue token (410).
+                # Anything we've not seen will be cleaned up
+                # when the operator is next restarted.
+                pods = core_api.list_pod_for_all_namespaces(
+                    label_selector=_JOB_POD_LABEL_SELECTOR,
+                    limit=_STARTUP_RESYNC_PAGE_SIZE,
+                    _continue=continue_token,
+                    _request_timeout=_REQUEST_TIMEOUT,
+                )
+
+                finished_pods: List[Tuple[str, str, Optional[datetime]]] = []
+                for pod in pods.items:
+                    num_listed += 1
+                    if _job_pod_can_be_deleted(
+                        pod.metadata.name, pod.status.phase, pod.metadata.labels
+                    ):
+                        finished_pods.append(
+                            (
+                                pod.metadata.name,
+                                pod.metadata.namespace,
+                                _pod_finished_at(pod),
+                            )
+                        )
+
+                # Delete this page's finished Pods,
+                # counting only those we actually deleted
+                # ('job_event' may have got to some of them first).
+                for deleted in executor.map(
+                    lambda finished_pod: _resync_delete_job_objects(*finished_pod),
+                    finished_pods,
+                ):
+                    if deleted:
+                        num_deleted += 1
+                _startup_metrics["resync_listed"] = num_listed
+                _startup_metrics["resync_deleted"] = num_deleted
+
+                # The continue token is (unusually) an underscored model attribute
+                continue_token = (
+                    pods.metadata._continue  # pylint: disable=protected-access
+                )
+                if not continue_token:
+                    break
+
+        resync_status = "complete"
+    except Exception:  # pylint: disable=broad-except
+        logging.exception("Startup resync failed")
+    finally:
+        resync_s: float = time.monotonic() - started
+        _startup_metrics["resync"] = resync_status
+        _startup_metrics["resync_s"] = round(resync_s, 3)
+        logging.info(
+            "Startup resync %s (listed=%s deleted=%s resync_s=%.3f)",
+            resync_status,
+            num_listed,
+            num_deleted,
+            resync_s,
+        )
+
+
+def _delete_job_objects(pod_name: str, pod_namespace: str) -> bool:
+    """Deletes a Job's Pod and its ConfigMap.
+    Errors are logged but otherwise ignored.
+    Returns True if the Pod was deleted.
+    """
+    logging.info('Deleting Pod "%s" (namespace=%s)...', pod_name, pod_namespace)
+
+    pod_deleted: bool = False
+    core_api: kubernetes.client.CoreV1Api = kubernetes.client.CoreV1Api()
+    try:
+        core_api.delete_namespaced_pod(
+            pod_name, pod_namespace, _request_timeout=_REQUEST_TIMEOUT
+        )
+        pod_deleted = True
+    except kubernetes.client.exceptions.ApiException as ex:
+        logging.warning(
+            'ApiException (%s) deleting Pod "%s" (%s)',
+            ex.status,
+            pod_name,
+            ex.body,
+        )
+
+    # Delete the ConfigMap
+    # This will fail for non-nextflow Pods
+    # We need a better way to identify the resources we created
+    cm_name = f"{pod_name}-nf-config"
+    logging.info('Deleting ConfigMap "%s"...', cm_name)
+    try:
+        core_api.delete_namespaced_config_map(
+            cm_name, pod_namespace, _request_timeout=_REQUEST_TIMEOUT
+        )
+    except kubernetes.client.exceptions.ApiException as ex:
+        logging.warning(
+            'ApiException (%s) deleting ConfigMap "%s" (%s)',
+            ex.status,
+            cm_name,
+            ex.body,
+        )
+
+    logging.info('Deleted "%s"', pod_name)
+    return pod_deleted
 
 
 @kopf.on.create("datamanagerjobs")
@@ -587,21 +867,10 @@ def job_event(event, **_):
 
         logging.info("Handling event type=%s pod_phase=%s...", event_type, pod_phase)
 
-        if pod_phase in ["Succeeded", "Failed", "Completed"]:
-            pod_name: str = pod["metadata"]["name"]
+        pod_name: str = pod["metadata"]["name"]
+        if _job_pod_can_be_deleted(pod_name, pod_phase, pod["metadata"]["labels"]):
             logging.info("...for Pod %s", pod_name)
 
-            # Ignore the event if it relates to a Pod
-            # that's explicitly marked for debug.
-            if "debug" in pod["metadata"]["labels"]:
-                logging.warning(
-                    'Not deleting Job "%s".'
-                    " It is protected from deletion"
-                    " as it has a debug label.",
-                    pod_name,
-                )
-                return
-
             # Ok to delete if we get here...
             logging.info('Job "%s" has finished.', pod_name)
             if _POD_PRE_DELETE_DELAY_S > 0:
@@ -612,39 +881,6 @@ def job_event(event, **_):
                 )
                 time.sleep(_POD_PRE_DELETE_DELAY_S)
 
-            # Delete the Pod
+            # Delete the Pod (and its ConfigMap)
             pod_namespace: str = pod["metadata"]["namespace"]
-            logging.info('Deleting Pod "%s" (namespace=%s)...', pod_name, pod_namespace)
-
-            core_api: kubernetes.client.CoreV1Api = kubernetes.client.CoreV1Api()
-            try:
-                core_api.delete_namespaced_pod(
-                    pod_name, pod_namespace, _request_timeout=_REQUEST_TIMEOUT
-                )
-            except kubernetes.client.exceptions.ApiException as ex:
-                logging.warning(
-                    'ApiException (%s) deleting Pod "%s" (%s)',
-                    ex.status,
-                    pod_name,
-                    ex.body,
-                )
-
-            # Delete the ConfigMap
-            # This will fail for non-nextflow Pods
-            # We need a better way to identify the resources we created
-            cm_name = f"{pod_name}-nf-config"
-            logging.info('Deleting ConfigMap "%s"...', cm_name)
-            core_api: kubernetes.client.CoreV1Api = kubernetes.client.CoreV1Api()
-            try:
-                core_api.delete_namespaced_config_map(
-                    cm_name, pod_namespace, _request_timeout=_REQUEST_TIMEOUT
-                )
-            except kubernetes.client.exceptions.ApiException as ex:
-                logging.warning(
-                    'ApiException (%s) deleting ConfigMap "%s" (%s)',
-                    ex.status,
-                    cm_name,
-                    ex.body,
-                )
-
-            logging.info('Deleted "%s"', pod_name)
+            _delete_job_objects(pod_name, pod_namespace)